@@ -1,12 +1,25 @@
 import os
 import re
-import json
+import asyncio
 import gspread
 import logging
-from datetime import datetime, date
+import math
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
 from telegram import Update
 from telegram.ext import Application, ContextTypes, MessageHandler, CommandHandler, filters
+from telegram.request import HTTPXRequest
+
+try:
+    from orjson import loads as json_loads  # opcional: parser JSON mais rápido
+except ImportError:
+    from json import loads as json_loads
 
 # ===============================
 # CONFIGURAÇÕES
@@ -19,6 +32,10 @@ logging.basicConfig(
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 SHEET_ID = os.getenv("SHEET_ID")
 GOOGLE_CREDENTIALS = os.getenv("GOOGLE_CREDENTIALS")
+# Opcional: sem ela o bot roda em polling. Com ela, rode o processo "web" do Procfile (que
+# recebe HTTP e $PORT) no lugar do "worker": depois do setWebhook o polling não recebe mais nada
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+PORT = int(os.getenv("PORT", "8443"))
 
 if not all([TELEGRAM_TOKEN, SHEET_ID, GOOGLE_CREDENTIALS]):
     raise Exception("❌ Faltam variáveis de ambiente: TELEGRAM_TOKEN, SHEET_ID ou GOOGLE_CREDENTIALS.")
@@ -26,94 +43,363 @@ if not all([TELEGRAM_TOKEN, SHEET_ID, GOOGLE_CREDENTIALS]):
 # ===============================
 # GOOGLE SHEETS
 # ===============================
-def conectar_sheets():
-    info = json.loads(GOOGLE_CREDENTIALS)
-    creds = Credentials.from_service_account_info(
-        info, scopes=["https://www.googleapis.com/auth/spreadsheets"]
-    )
-    client = gspread.authorize(creds)
-    sheet = client.open_by_key(SHEET_ID).sheet1
-
-    if not sheet.get_all_values():
+# A chave da conta de serviço é lida e decodificada uma vez só; o token OAuth
+# fica guardado no objeto Credentials de cada conexão e é renovado automaticamente quando expira
+_CHAVE_SERVICO = json_loads(GOOGLE_CREDENTIALS)
+_ESCOPOS = ["https://www.googleapis.com/auth/spreadsheets"]
+TIMEOUT_SHEETS = (5, 30)  # segundos para conectar e para receber a resposta da API
+
+_sheet = None
+_client = None
+_faixa_append = None  # "'Página1'!A1", calculada uma vez na conexão
+_sheet_lock = threading.Lock()
+_cabecalho_verificado = False
+
+
+def _garantir_cabecalho(sheet):
+    """Escreve o cabeçalho numa planilha vazia; só roda na primeira conexão do processo"""
+    global _cabecalho_verificado
+    if _cabecalho_verificado:
+        return
+    if not sheet.row_values(1):  # basta a primeira linha para saber se a planilha está vazia
         sheet.append_row(["Usuário", "Valor", "Categoria", "Data", "Forma de Pagamento", "Observações"])
-    return sheet
+    _cabecalho_verificado = True
 
 
-def salvar_dados(nome, valor, categoria, data, forma_pagamento, observacoes):
-    """Salva o valor como texto '12.50' para evitar bug de formatação do Sheets"""
-    sheet = conectar_sheets()
-    data_iso = data.strftime("%Y-%m-%d")
+def conectar_sheets():
+    """Autoriza e abre a planilha uma única vez; as chamadas seguintes reutilizam o mesmo Worksheet"""
+    global _sheet, _client, _faixa_append
+    if _sheet is not None:
+        return _sheet
+
+    with _sheet_lock:
+        if _sheet is None:
+            creds = Credentials.from_service_account_info(_CHAVE_SERVICO, scopes=_ESCOPOS)
+            # Uma única sessão HTTP (keep-alive) para todas as chamadas à API do Sheets
+            sessao = AuthorizedSession(creds)
+            sessao.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32))
+            _client = gspread.Client(auth=creds, session=sessao)
+            # Sem timeout o requests espera para sempre: um append travado pararia a fila de gravação
+            _client.set_timeout(TIMEOUT_SHEETS)
+            sheet = _client.open_by_key(SHEET_ID).sheet1
+            _garantir_cabecalho(sheet)
+            _faixa_append = "'{}'!A1".format(sheet.title.replace("'", "''"))
+            _sheet = sheet
+    return _sheet
+
+
+def _descartar_conexao():
+    global _sheet, _client
+    with _sheet_lock:
+        _sheet = None
+        _client = None
+
+
+def _com_reconexao(operacao):
+    """Executa operacao(sheet), reconectando uma vez se o token for recusado"""
+    # Um 401 que sobrevive à renovação do token: reconecta com credenciais novas e tenta mais uma vez.
+    # Token expirado já é resolvido pelo AuthorizedSession, que renova e repete a chamada no 401.
+    # Um 403 (planilha não compartilhada, sem permissão) não se resolve reconectando: sobe direto
+    try:
+        return operacao(conectar_sheets())
+    except gspread.exceptions.APIError as e:
+        if e.response.status_code != 401:
+            raise
+        logging.warning("Sheets recusou o token mesmo após renovar; recriando as credenciais...")
+        _descartar_conexao()
+        return operacao(conectar_sheets())
+
 
-    valor_str = f"{valor:.2f}"  # salva como texto "12.50"
-    sheet.append_row([
+def montar_linha(nome, valor, categoria, data, forma_pagamento, observacoes):
+    """Monta a linha da planilha para um gasto"""
+    data_iso = data.isoformat()  # "2026-10-03", sem o parser de formato do strftime
+
+    valor_str = f"{valor:.2f}"  # salva como texto "12.50" para evitar bug de formatação do Sheets
+    return [
         nome,
         valor_str,
-        categoria.title(),
+        categoria,
         data_iso,
-        forma_pagamento.capitalize() if forma_pagamento else "—",
+        forma_pagamento or "—",
         observacoes or "—"
-    ])
+    ]
 
 
-def obter_totais():
-    """Calcula total geral e por categoria"""
-    sheet = conectar_sheets()
-    dados = sheet.get_all_records()
+def _anexar_linhas(sheet, linhas):
+    """Uma chamada values.append direta, com a faixa já pronta"""
+    sheet.spreadsheet.values_append(
+        _faixa_append,
+        # RAW (e não USER_ENTERED): o valor continua gravado como texto "12.50"
+        params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+        body={"values": linhas},
+    )
 
-    if not dados:
-        return 0.0, {}
 
-    total_geral = 0.0
-    totais_por_categoria = {}
+def salvar_dados_bulk(gastos):
+    """Grava vários gastos (tuplas com os argumentos de montar_linha) com uma única chamada à API"""
+    linhas = [montar_linha(*gasto) for gasto in gastos]
+    # Centavos calculados antes do append: depois que a API aceitou as linhas nada pode falhar,
+    # senão o lote volta para a fila e é gravado de novo
+    somas = [(_centavos(float(linha[1])), linha[2]) for linha in linhas]
+    # O lock de gravação impede que um /atualizar leia a planilha entre o append e a soma
+    # (contaria em dobro); o lock dos totais só é pego para a soma, e os comandos não esperam o Sheets
+    with cache_totais.lock_gravacao:
+        _com_reconexao(lambda sheet: _anexar_linhas(sheet, linhas))
+        with cache_totais.lock:
+            if cache_totais.carregado:
+                for centavos, categoria in somas:
+                    cache_totais.adicionar(centavos, categoria)
+            cache_totais.geracao += 1  # invalida as respostas dos comandos montadas antes desta gravação
 
-    for linha in dados:
-        valor_bruto = str(linha["Valor"]).strip()
-        if not valor_bruto:
-            continue
 
-        # Converte corretamente tanto "12,50" quanto "12.50"
-        valor_bruto = valor_bruto.replace(",", ".")
-        try:
-            valor = float(valor_bruto)
-        except ValueError:
-            continue
+def _centavos(valor):
+    """Converte reais em centavos inteiros: somas em int são exatas, sem arredondamento de float"""
+    return round(valor * 100)
+
+
+def _brl(centavos):
+    """Formata centavos no padrão brasileiro numa passada só: 123456 -> 'R$ 1.234,56'"""
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), 100)
+    return f"R$ {sinal}{reais:,}".replace(",", ".") + f",{resto:02d}"
+
+
+class CacheTotais:
+    """Total geral e por categoria (em centavos) mantidos em memória, lidos da planilha uma única vez"""
+
+    def __init__(self):
+        self.total_centavos = 0
+        self.centavos_por_categoria = {}
+        self.carregado = False
+        self.geracao = 0  # muda a cada gravação ou releitura; só é alterada com o lock
+        self.lock = threading.RLock()  # só os totais em memória: nunca é segurado numa chamada ao Sheets
+        self.lock_gravacao = threading.Lock()  # append + soma e leitura + troca, uma operação por vez
+
+    def carregar(self, sheet):
+        with self.lock_gravacao:
+            self._carregar(sheet)
+
+    def _carregar(self, sheet):
+        # Só as colunas Valor (B) e Categoria (C), numa única faixa: [[valor, categoria], ...]
+        linhas = sheet.get_values("B2:C")
 
-        categoria = linha.get("Categoria", "Geral").title()
-        total_geral += valor
-        totais_por_categoria[categoria] = totais_por_categoria.get(categoria, 0) + valor
+        total_centavos = 0
+        centavos_por_categoria = {}
 
-    return total_geral, totais_por_categoria
+        for linha in linhas:
+            valor_bruto = linha[0].strip() if linha else ""
+            if not valor_bruto:
+                continue
+
+            # Converte corretamente tanto "12,50" quanto "12.50"
+            valor_bruto = valor_bruto.replace(",", ".")
+            try:
+                centavos = _centavos(float(valor_bruto))
+            except (ValueError, OverflowError):  # texto, "nan" ou "inf"
+                continue
+
+            categoria = (linha[1] if len(linha) > 1 and linha[1] else "Geral").title()
+            total_centavos += centavos
+            centavos_por_categoria[categoria] = centavos_por_categoria.get(categoria, 0) + centavos
+
+        with self.lock:
+            self.total_centavos = total_centavos
+            self.centavos_por_categoria = centavos_por_categoria
+            self.carregado = True
+            self.geracao += 1
+
+    def adicionar(self, centavos, categoria):
+        with self.lock:
+            self.total_centavos += centavos
+            self.centavos_por_categoria[categoria] = self.centavos_por_categoria.get(categoria, 0) + centavos
+
+    def obter(self):
+        with self.lock:
+            return self.total_centavos, dict(self.centavos_por_categoria)
+
+
+cache_totais = CacheTotais()
+
+
+def obter_totais():
+    """Total geral e por categoria, em centavos (a planilha só é lida no primeiro acesso)"""
+    if not cache_totais.carregado:
+        _com_reconexao(cache_totais.carregar)
+    return cache_totais.obter()
+
+
+def recarregar_totais():
+    """Descarta os totais em memória e lê a planilha de novo (para edições feitas direto no Sheets)"""
+    _com_reconexao(cache_totais.carregar)
+    return cache_totais.obter()
 
 
 # ===============================
-# INTERPRETA MENSAGEM
+# FILA DE GRAVAÇÃO
 # ===============================
-def parse_mensagem(mensagem, data_mensagem):
-    valores = re.findall(r"\d+(?:[.,]\d+)?", mensagem)
-    valor = float(valores[0].replace(",", ".")) if valores else 0.0
-
-    forma_pagamento = ""
-    for fp in ["cartão", "cartao", "dinheiro", "pix", "transferência", "transferencia", "boleto"]:
-        if fp in mensagem.lower():
-            forma_pagamento = fp
+LOTE_MAXIMO = 100
+INTERVALO_GRAVACAO = 1.0  # segundos entre dois append_rows (a cota de escrita do Sheets é 60/min)
+ESPERA_MAXIMA_ERRO = 60.0  # teto do backoff exponencial quando o Sheets falha
+THREADS_SHEETS = 8  # limite de chamadas simultâneas ao Sheets fora do event loop
+
+pendentes = asyncio.Queue()
+_reenvio = []  # lote que falhou: é gravado antes de qualquer gasto novo da fila
+_tarefa_gravacao = None
+
+
+async def salvar_dados(nome, valor, categoria, data, forma_pagamento, observacoes):
+    """Enfileira o gasto; a gravação na planilha é feita em lote por gravar_pendentes()"""
+    await pendentes.put((nome, valor, categoria, data, forma_pagamento, observacoes))
+
+
+def _retirar_lote(primeiro=None):
+    # O que falhou vem primeiro, para as linhas chegarem à planilha na ordem em que foram enviadas
+    gastos = _reenvio[:LOTE_MAXIMO]
+    del _reenvio[:LOTE_MAXIMO]
+    if primeiro is not None:
+        gastos.append(primeiro)
+    while len(gastos) < LOTE_MAXIMO and not pendentes.empty():
+        gastos.append(pendentes.get_nowait())
+    return gastos
+
+
+async def gravar_pendentes():
+    """Espera gastos na fila e grava tudo o que estiver acumulado com um único append_rows"""
+    loop = asyncio.get_running_loop()
+    proxima_gravacao = loop.time()
+    espera_erro = INTERVALO_GRAVACAO
+    while True:
+        # Prazo absoluto no relógio monotônico: com o bot ocioso grava na hora; em rajadas,
+        # o que chegar até o prazo entra no mesmo lote, sem acumular atraso entre os ciclos.
+        # A espera vem antes do get(): cancelada aqui, a tarefa não está segurando nenhum gasto
+        await asyncio.sleep(max(0.0, proxima_gravacao - loop.time()))
+        primeiro = None if _reenvio else await pendentes.get()
+        proxima_gravacao = loop.time() + INTERVALO_GRAVACAO
+        gastos = _retirar_lote(primeiro)
+        gravacao = asyncio.ensure_future(asyncio.to_thread(salvar_dados_bulk, gastos))
+        try:
+            await asyncio.shield(gravacao)
+            espera_erro = INTERVALO_GRAVACAO
+        except asyncio.CancelledError:
+            # Desligamento no meio do append: deixa a gravação terminar; se falhar, o lote
+            # volta para o reenvio e encerrar_gravacao() tenta de novo
+            try:
+                await gravacao
+            except Exception:
+                _reenvio[:0] = gastos
+            raise
+        except Exception as e:
+            # Backoff exponencial: o lote vai para o reenvio e a próxima tentativa fica mais espaçada
+            espera_erro = min(espera_erro * 2, ESPERA_MAXIMA_ERRO)
+            proxima_gravacao = loop.time() + espera_erro
+            logging.error(
+                f"Erro ao gravar {len(gastos)} gasto(s) na planilha: {e} "
+                f"(nova tentativa em {espera_erro:.0f}s)"
+            )
+            _reenvio[:0] = gastos
+
+
+async def iniciar_gravacao(app: Application):
+    global _tarefa_gravacao
+    # asyncio.to_thread usa o executor padrão: limitado para não abrir threads sem fim se o Sheets travar
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREADS_SHEETS))
+    _tarefa_gravacao = asyncio.create_task(gravar_pendentes())
+
+
+async def encerrar_gravacao(app: Application):
+    """Chamado no desligamento (inclusive SIGTERM): grava o que ainda estiver na fila"""
+    if _tarefa_gravacao:
+        _tarefa_gravacao.cancel()
+        try:
+            await _tarefa_gravacao  # espera a tarefa devolver o lote que estava gravando
+        except asyncio.CancelledError:
+            pass
+    while _reenvio or not pendentes.empty():
+        gastos = _retirar_lote()
+        try:
+            await asyncio.to_thread(salvar_dados_bulk, gastos)
+        except Exception as e:
+            logging.error(f"Erro ao gravar {len(gastos)} gasto(s) pendente(s) no desligamento: {e}")
             break
 
-    palavras = re.findall(r"[A-Za-zÀ-ÿ]+", mensagem)
-    palavras = [p for p in palavras if p.lower() not in forma_pagamento.lower()]
-    categoria = palavras[0] if palavras else "Geral"
 
-    data_regex = re.search(r"(\d{2}/\d{2}/\d{4})", mensagem)
-    if data_regex:
-        data = datetime.strptime(data_regex.group(0), "%d/%m/%Y").date()
-    else:
-        data = data_mensagem.date()
+# ===============================
+# INTERPRETA MENSAGEM
+# ===============================
+# Um único regex classifica cada trecho da mensagem; a data vem antes do número
+# para que "03/10/2026" não seja lido como o valor 3
+_TOKEN_RE = re.compile(
+    r"(?P<data>(?P<d>\d{2})/(?P<m>\d{2})/(?P<a>\d{4})|(?P<a2>\d{4})-(?P<m2>\d{2})-(?P<d2>\d{2}))"
+    r"|(?P<num>\d+(?:[.,]\d+)?)"
+    r"|(?P<palavra>[A-Za-zÀ-ÿ]+)"
+)
+_FP_RE = re.compile(r"cart[aã]o|dinheiro|pix|transfer[eê]ncia|boleto", re.IGNORECASE)
+# Forma sem acento -> nome canônico, para "cartao" e "cartão" não virarem duas formas de pagamento
+_SEM_ACENTO = str.maketrans("ãê", "ae")
+_FP_CANONICA = {
+    "cartao": "cartão",
+    "dinheiro": "dinheiro",
+    "pix": "pix",
+    "transferencia": "transferência",
+    "boleto": "boleto",
+}
 
-    obs = re.sub(r"\d+(?:[.,]\d+)?", "", mensagem)
-    obs = re.sub(categoria, "", obs, flags=re.IGNORECASE)
-    obs = re.sub(forma_pagamento, "", obs, flags=re.IGNORECASE)
-    observacoes = obs.strip()
 
-    return valor, categoria, data, forma_pagamento, observacoes
+def parse_mensagem(mensagem, data_mensagem):
+    """Lê valor, categoria, data, forma de pagamento e observações da mensagem"""
+    valor, categoria, data, forma_pagamento, observacoes = _parse_texto(mensagem)
+    return valor, categoria, data or data_mensagem.date(), forma_pagamento, observacoes
+
+
+@lru_cache(maxsize=2048)
+def _parse_texto(mensagem):
+    """Parse numa única passada, só do texto: mensagens repetidas ("Uber 20 pix") saem do cache"""
+    valor = None
+    data = None
+    categoria = None
+    categoria_cf = ""  # casefold da categoria, calculado uma vez só
+    forma_pagamento = ""
+    sobra = []  # trechos que não foram consumidos: viram as observações
+    fim_anterior = 0
+
+    for m in _TOKEN_RE.finditer(mensagem):
+        tipo, texto = m.lastgroup, m.group()
+        if tipo == "num":
+            if valor is None:
+                valor = float(texto.replace(",", "."))
+                if not math.isfinite(valor * 100):  # número enorme vira "inf" e não cabe em centavos
+                    raise ValueError(f"Valor fora do limite: {texto[:20]}...")
+        elif tipo == "data":
+            if data is None:
+                # Direto dos grupos nomeados, sem o parser de formato do strptime
+                data = date(int(m["a"] or m["a2"]), int(m["m"] or m["m2"]), int(m["d"] or m["d2"]))
+        elif _FP_RE.fullmatch(texto):
+            fp = texto.lower()
+            fp = _FP_CANONICA.get(fp.translate(_SEM_ACENTO), fp)
+            if not forma_pagamento:
+                forma_pagamento = fp
+            elif fp != forma_pagamento:
+                continue  # outra forma de pagamento citada fica nas observações
+        elif categoria is None:
+            categoria = texto
+            categoria_cf = texto.casefold()
+        elif texto.casefold() != categoria_cf:
+            continue  # palavra comum: fica nas observações
+
+        sobra.append(mensagem[fim_anterior:m.start()])
+        fim_anterior = m.end()
+
+    sobra.append(mensagem[fim_anterior:])
+    observacoes = "".join(sobra).strip()
+
+    # Já no formato gravado na planilha: quem usa o resultado não precisa normalizar de novo
+    return (
+        valor if valor is not None else 0.0,
+        (categoria or "Geral").title(),
+        data,  # None sem data no texto: a data do envio é aplicada fora do cache
+        forma_pagamento.capitalize(),
+        observacoes,
+    )
 
 
 # ===============================
@@ -126,14 +412,14 @@ async def process_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         nome = update.message.from_user.first_name
 
         valor, categoria, data, forma_pagamento, observacoes = parse_mensagem(mensagem, data_mensagem)
-        salvar_dados(nome, valor, categoria, data, forma_pagamento, observacoes)
+        await salvar_dados(nome, valor, categoria, data, forma_pagamento, observacoes)
 
         await update.message.reply_text(
             f"✅ {nome}, gasto registrado!\n\n"
-            f"💰 Valor: R$ {valor:.2f}\n"
-            f"📂 Categoria: {categoria.title()}\n"
-            f"📅 Data: {data.strftime('%d/%m/%Y')}\n"
-            f"💳 Pagamento: {forma_pagamento.capitalize() or '—'}\n"
+            f"💰 Valor: {_brl(_centavos(valor))}\n"
+            f"📂 Categoria: {categoria}\n"
+            f"📅 Data: {data.day:02d}/{data.month:02d}/{data.year}\n"
+            f"💳 Pagamento: {forma_pagamento or '—'}\n"
             f"📝 Obs: {observacoes or '—'}"
         )
 
@@ -145,35 +431,68 @@ async def process_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ===============================
 # COMANDOS
 # ===============================
-async def comando_total(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    total, _ = obter_totais()
-    await update.message.reply_text(f"💰 Total de gastos: R$ {total:.2f}")
+TTL_RESPOSTAS = 10.0  # segundos
 
+# comando -> (instante, geração dos totais, texto)
+_respostas = {}
 
-async def comando_categorias(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    _, totais = obter_totais()
+
+async def _resposta(comando, montar):
+    """Reaproveita a resposta do comando montada há menos de TTL_RESPOSTAS segundos"""
+    # Só vale enquanto os totais não mudarem. A geração é lida antes dos totais: se uma gravação
+    # terminar no meio da leitura, a resposta fica marcada com a geração antiga e não é reaproveitada
+    geracao = cache_totais.geracao
+    guardada = _respostas.get(comando)
+    if guardada and guardada[1] == geracao and time.monotonic() - guardada[0] < TTL_RESPOSTAS:
+        return guardada[2]
+
+    total, totais = await asyncio.to_thread(obter_totais)
+    texto = montar(total, totais)
+    _respostas[comando] = (time.monotonic(), geracao, texto)
+    return texto
+
+
+def _linhas_categorias(totais):
+    # Uma única junção em vez de += dentro do laço (que realoca a string a cada categoria)
+    return "".join([f"• {cat}: {_brl(val)}\n" for cat, val in totais.items()])
+
+
+def _texto_total(total, totais):
+    return f"💰 Total de gastos: {_brl(total)}"
+
+
+def _texto_categorias(total, totais):
     if not totais:
-        await update.message.reply_text("📊 Nenhum gasto registrado ainda.")
-        return
+        return "📊 Nenhum gasto registrado ainda."
 
-    resposta = "📂 *Total por Categoria:*\n\n"
-    for cat, val in totais.items():
-        resposta += f"• {cat}: R$ {val:.2f}\n"
+    return "📂 *Total por Categoria:*\n\n" + _linhas_categorias(totais)
 
-    await update.message.reply_text(resposta, parse_mode="Markdown")
+
+def _texto_resumo(total, totais):
+    if not totais:
+        return "📊 Nenhum gasto registrado ainda."
+
+    return (
+        f"📘 *Resumo Geral:*\n\n💰 Total: {_brl(total)}\n\n📂 *Por Categoria:*\n"
+        + _linhas_categorias(totais)
+    )
+
+
+async def comando_total(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(await _resposta("total", _texto_total))
+
+
+async def comando_categorias(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text(await _resposta("categorias", _texto_categorias), parse_mode="Markdown")
 
 
 async def comando_resumo(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    total, totais = obter_totais()
-    if not totais:
-        await update.message.reply_text("📊 Nenhum gasto registrado ainda.")
-        return
+    await update.message.reply_text(await _resposta("resumo", _texto_resumo), parse_mode="Markdown")
 
-    resposta = f"📘 *Resumo Geral:*\n\n💰 Total: R$ {total:.2f}\n\n📂 *Por Categoria:*\n"
-    for cat, val in totais.items():
-        resposta += f"• {cat}: R$ {val:.2f}\n"
 
-    await update.message.reply_text(resposta, parse_mode="Markdown")
+async def comando_atualizar(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    total, _ = await asyncio.to_thread(recarregar_totais)
+    await update.message.reply_text(f"🔄 Totais relidos da planilha. Total: {_brl(total)}")
 
 
 async def comando_ajuda(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -182,6 +501,7 @@ async def comando_ajuda(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/total → mostra o total geral\n"
         "/categorias → total por categoria\n"
         "/resumo → total + categorias\n"
+        "/atualizar → relê os totais da planilha\n"
         "/ajuda → mostra esta mensagem\n\n"
         "📝 Para registrar um gasto, envie uma mensagem como:\n"
         "`Padaria 12,50 pix` ou `Gasolina 100 dinheiro`"
@@ -192,17 +512,48 @@ async def comando_ajuda(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ===============================
 # INICIALIZAÇÃO
 # ===============================
-def main():
-    logging.info("🚀 Iniciando FinBot (modo local - polling)...")
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+def build_application(token):
+    """Monta o Application com todos os handlers (importar o módulo não cria nenhum bot)"""
+    app = (
+        Application.builder()
+        .token(token)
+        # HTTP/2: respostas simultâneas compartilham a mesma conexão TLS com api.telegram.org
+        .request(HTTPXRequest(connection_pool_size=32, pool_timeout=10, connect_timeout=5.0, http_version="2"))
+        .get_updates_request(HTTPXRequest(connect_timeout=5.0, http_version="2"))
+        .concurrent_updates(True)
+        .post_init(iniciar_gravacao)
+        .post_stop(encerrar_gravacao)
+        .build()
+    )
 
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, process_message))
     app.add_handler(CommandHandler("total", comando_total))
     app.add_handler(CommandHandler("categorias", comando_categorias))
     app.add_handler(CommandHandler("resumo", comando_resumo))
+    app.add_handler(CommandHandler("atualizar", comando_atualizar))
     app.add_handler(CommandHandler("ajuda", comando_ajuda))
+    return app
 
-    app.run_polling()
+
+def main():
+    obter_totais()  # carrega os totais da planilha uma vez, antes de atender mensagens
+    app = build_application(TELEGRAM_TOKEN)
+
+    # O bot só trata mensagens: o Telegram deixa de enviar os outros tipos de update
+    if WEBHOOK_URL:
+        # Só funciona no processo "web": um worker não recebe o tráfego HTTP do Telegram
+        logging.info("🚀 Iniciando FinBot (webhook)...")
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=PORT,
+            url_path=TELEGRAM_TOKEN,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{TELEGRAM_TOKEN}",
+            max_connections=40,
+            allowed_updates=["message"],
+        )
+    else:
+        logging.info("🚀 Iniciando FinBot (modo local - polling)...")
+        app.run_polling(allowed_updates=["message"])
 
 
 if __name__ == "__main__":